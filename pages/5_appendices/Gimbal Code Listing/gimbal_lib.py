@@ -5,18 +5,32 @@ Simplified 2-Axis Gimbal Controller (AZ/EL) — NSC-G3-E / Galil-safe
 Enhancements:
 - Adds streaming-safe Position Tracking (PT) mode for continuous target updates
   without BG/AM/MC, preventing TC:7 ("not valid while running") during PCHIP streams.
-- Keeps classic PA/PR + BG flows for non-streaming helpers (move_absolute, move_relative).
+- Keeps classic PA/PR + BG flows when streaming=False (and for move_relative).
+- move_absolute / degSteer stay in PT while streaming (no ST/PT toggling per call).
 - Uses _TNX/_TNY polling for waits (as before) and adds a settle loop for PT.
 
 Key choices (unchanged unless noted):
 - Classic PA/PR/BG supported.
 - AC/DC/SP classic 'AC x,y', 'DC x,y', 'SP x,y'.
 - One command per line (no semicolons).
-- Waits via _TNX/_TNY polling (no AMX/AMY).
+- Waits via _TNX/_TNY polling (no AMX/AMY), or opt-in EI motion-complete interrupts
+  (GInterrupt reader thread on a second, short-timeout '-s EI' connection).
+- Position reads combined into one round-trip ('MG _TPX,_TPY' instead of TP X + TP Y).
 - Light connection retry (given string → raw IP → '-d').
+- Position state is saved on close() (and at interpreter exit / SIGTERM) — never per move;
+  async_save() offers opt-in persistence off the motion thread.
+- submit_target(): coalescing single-slot target + background PA dispatcher
+  (a fast producer never queues stale targets; only the freshest is sent).
 """
 
+import re
 import time
+import atexit
+import signal
+import struct
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from pathlib import Path
 
@@ -31,9 +45,23 @@ EL_MIN, EL_MAX = -90.0, 90.0
 MAX_STEP_DEG = None  # reserved for future segmentation
 # ---------------------------------------------------
 
-STATE_FILE = "dependencies/gimbal_state/currGimbalPosition.txt"
+STATE_FILE = "dependencies/gimbal_state/currGimbalPosition.bin"  # 3 × float64 (struct '3d')
+LEGACY_STATE_FILE = "dependencies/gimbal_state/currGimbalPosition.txt"  # pre-.bin text format
 MIN_PR_COUNTS = 10    # deadband to avoid tiny moves
 MIN_PA_DELTA = 6      # counts; ignore microscopic PA updates in PT
+POLL_DT_MIN = 0.001   # s; first poll back-off in wait loops
+POLL_DT_MAX = 0.010   # s; back-off cap (grows ×1.5 per poll)
+STREAM_TICK_S = 0.02  # s; submit_target dispatcher sends at most one PA per tick (50 Hz)
+
+# Fast parse of a two-value MG reply, e.g. ' 1234.0000 -5678.0000'
+_RE_TWO_FLOATS = re.compile(r"\s*([-+]?[\d.]+)\s+([-+]?[\d.]+)")
+
+# EI interrupt mask / GInterrupt status bytes (motion complete)
+EI_MASK_XY = 0x03          # bit0 = X complete, bit1 = Y complete
+INT_DONE_X = 0xD0
+INT_DONE_Y = 0xD1
+INT_DONE_ALL = 0xC8
+INT_TIMEOUT_MS = 200       # GInterrupt timeout on the interrupt connection (bounds close/join)
 
 AXIS_AZ = 'X'
 AXIS_EL = 'Y'
@@ -44,6 +72,8 @@ CNT_PER_DEG_EL = 10000
 
 
 def _clip(v, lo, hi):
+    if v != v:
+        raise ValueError("target is NaN")
     return max(lo, min(hi, v))
 
 
@@ -51,9 +81,13 @@ def _safe_load_pos():
     try:
         p = Path(STATE_FILE)
         if not p.exists():
+            # One-time migration: fall back to the old np.savetxt file if present
+            legacy = Path(LEGACY_STATE_FILE)
+            if legacy.exists():
+                vals = np.loadtxt(legacy)
+                return [float(vals[0]), float(vals[1]), float(vals[2])]
             return [0.0, 0.0, 0.0]
-        vals = np.loadtxt(p)
-        return [float(vals[0]), float(vals[1]), float(vals[2])]
+        return list(struct.unpack("3d", p.read_bytes()))
     except Exception:
         return [0.0, 0.0, 0.0]
 
@@ -61,14 +95,38 @@ def _safe_load_pos():
 def _safe_save_pos(vec3):
     try:
         Path(STATE_FILE).parent.mkdir(parents=True, exist_ok=True)
-        np.savetxt(STATE_FILE, np.asarray(vec3))
+        Path(STATE_FILE).write_bytes(struct.pack("3d", *vec3))
     except Exception as e:
         print(f"[WARN] Could not save position: {e}")
 
 
+def _sigterm_to_exit(signum, frame):
+    raise SystemExit(128 + signum)
+
+
+_sigterm_installed = False
+
+
+def _install_sigterm_once():
+    """
+    Turn SIGTERM into SystemExit so finally-blocks and atexit save run.
+    Process-wide, so done at most once, only from the main thread, and only
+    if nobody else has installed a handler.
+    """
+    global _sigterm_installed
+    if _sigterm_installed:
+        return
+    _sigterm_installed = True
+    try:
+        if signal.getsignal(signal.SIGTERM) is signal.SIG_DFL:
+            signal.signal(signal.SIGTERM, _sigterm_to_exit)
+    except (ValueError, OSError, AttributeError):
+        pass  # not in main thread / platform without SIGTERM
+
+
 class GimbalController:
     def __init__(self, connection, cnt_per_deg=(CNT_PER_DEG_AZ, CNT_PER_DEG_EL),
-                 assume_zero_on_connect=True, streaming=True):
+                 assume_zero_on_connect=True, streaming=True, interrupts=False):
         """
         connection: e.g. '192.168.1.2' or '192.168.1.2 -d'
         assume_zero_on_connect=True:
@@ -76,17 +134,54 @@ class GimbalController:
         streaming=True:
             Enable Position Tracking (PT) mode so PA targets can be updated DURING motion
             with no BG — ideal for high-rate PCHIP streams.
+        interrupts=False:
+            If True, open a second '<addr> -s EI' connection for EI motion-complete
+            interrupts so classic waits are edge-triggered instead of polled.
+            Falls back to _TN polling if unavailable.
         """
         print("[INIT] Connecting to Galil Controller...")
+        self._log = logging.getLogger(__name__)
         self.cnt_az, self.cnt_el = cnt_per_deg
+        # Cached float scales + limits for the hot conversion/clip path
+        self._cnt_az_f, self._cnt_el_f = float(self.cnt_az), float(self.cnt_el)
+        self._lim = (AZ_MIN, AZ_MAX, EL_MIN, EL_MAX)
         self.curr_az, self.curr_el = 0.0, 0.0
-        self.curr_pos = _safe_load_pos()
+        # Persistent [az, el, 0] state buffer, updated in place (no per-move allocation)
+        self._pos = np.zeros(3, dtype=np.float64)
+        self._pos[:] = _safe_load_pos()
+        self._pos[2] = 0.0  # third slot is always 0 (as the old [az, el, 0.0] rebuild)
+        self._closed = False
+        self._save_pool = None  # lazily created single-worker pool for async_save()
+        _install_sigterm_once()
         self._assume_zero = assume_zero_on_connect
         self.streaming = streaming
+        self._last_cmd_cnt = (None, None)  # last PA target (counts); None = unknown
+
+        # Coalescing single-slot target for submit_target() (freshest wins)
+        self._pending_target = None
+        self._pending_lock = threading.Lock()
+        # gclib.py's GCommand shares one reply buffer per handle: serialize all I/O
+        self._io_lock = threading.RLock()
+        self._pending_evt = threading.Event()
+        self._stream_stop = threading.Event()
+        self._stream_thread = None
+
+        # EI motion-complete interrupts (per-axis events set by _int_reader)
+        self._inpos_evt = {AXIS_AZ: threading.Event(), AXIS_EL: threading.Event()}
+        self._int_stop = threading.Event()
+        self._int_thread = None
+        self._gi = None  # dedicated interrupt connection (own reply buffer + short timeout)
 
         self.sim = gclib is None
         if self.sim:
             print("[SIMULATION MODE] No gclib available; motions won't go to hardware.")
+            atexit.register(self._save_on_exit)
+            # Specialize the movement API once instead of checking self.sim per call
+            self.move_absolute = self._move_absolute_sim
+            self.move_relative = self._move_relative_sim
+            self.degSteer = self._degSteer_sim
+            self.stream_targets = self._stream_targets_sim
+            self.submit_target = self._submit_target_sim
             return
 
         # --- Light connection retry for robustness ---
@@ -106,9 +201,14 @@ class GimbalController:
                 variants.append(dash_d)
 
         last_err = None
-        for cand in variants:
+        retry_delays = (0.0, 0.05, 0.2)  # first try immediate, then short back-off
+        for attempt, cand in enumerate(variants):
+            delay = retry_delays[min(attempt, len(retry_delays) - 1)]
+            if delay:
+                time.sleep(delay)
             try:
                 self.g.GOpen(cand)
+                self._gcmd = self.g.GCommand  # pre-bound: skips attribute lookups per command
                 try:
                     self.g.timeout = 120000  # ms
                 except Exception:
@@ -124,9 +224,9 @@ class GimbalController:
                     self.g.GClose()
                 except Exception:
                     pass
-                time.sleep(0.2)
         else:
             raise RuntimeError(f"Failed to connect using {variants}: {last_err}")
+        atexit.register(self._save_on_exit)  # only once connected; close() unregisters
 
         # Bring controller to a known state and set motion params
         self._setup_motion()
@@ -138,26 +238,68 @@ class GimbalController:
         # Sync our object state from controller (counts → deg)
         self._sync_from_controller()
 
+        if interrupts:
+            self._enable_interrupts(cand)
+
+    @property
+    def curr_pos(self):
+        """
+        [az, el, 0] state vector. NOTE: now a float64 np.ndarray (was a list), and a
+        live view of the persistent buffer — it changes on every move; copy it
+        (e.g. list(g.curr_pos)) to keep a snapshot.
+        """
+        return self._pos
+
+    @curr_pos.setter
+    def curr_pos(self, vec3):
+        """Assignment copies the 3 values into the persistent buffer."""
+        self._pos[:] = vec3
+
     # -------------- low-level I/O --------------
     def _cmd(self, s, quiet=False):
-        """Send a raw Galil command, with '?' handling that also fetches TC when possible."""
-        try:
-            resp = self.g.GCommand(s)
-            if not quiet:
-                msg = resp.strip().replace("\r", " ").replace("\n", " ")
-                print(f"[GALIL] {s}" + ("" if not msg else f" -> {msg}"))
-            return resp
-        except gclib.GclibError as e:
-            # Try to fetch TC code for diagnostics
+        """
+        Send a raw Galil command, with '?' handling that also fetches TC when possible.
+        Echo goes to logging at DEBUG and is only formatted when that level is enabled;
+        the extra TC round-trip on errors is only made when WARNING is enabled.
+        """
+        with self._io_lock:
             try:
-                tc = self.g.GCommand("TC").strip()
+                resp = self._gcmd(s)
+                if not quiet and self._log.isEnabledFor(logging.DEBUG):
+                    msg = resp.strip().replace("\r", " ").replace("\n", " ")
+                    self._log.debug("[GALIL] %s%s", s, f" -> {msg}" if msg else "")
+                return resp
+            except gclib.GclibError as e:
+                if self._log.isEnabledFor(logging.WARNING):
+                    # Try to fetch TC code for diagnostics
+                    try:
+                        tc = self._gcmd("TC").strip()
+                    except Exception:
+                        tc = "<TC read failed>"
+                    self._log.warning("[GALIL ERROR] %s\n  → %s\n  → TC: %s", s, e, tc)
+                raise
             except Exception:
-                tc = "<TC read failed>"
-            print(f"[GALIL ERROR] {s}\n  → {e}\n  → TC: {tc}")
-            raise
-        except Exception:
-            print(f"[GALIL ERROR] {s}")
-            raise
+                self._log.warning("[GALIL ERROR] %s", s)
+                raise
+
+    def _cmd_multi(self, operands):
+        """
+        Read several controller operands in ONE round-trip via 'MG a,b,...'.
+        Returns a list of floats in the same order as `operands`.
+        """
+        resp = self._cmd("MG " + ",".join(operands), quiet=True).split()
+        if len(resp) < len(operands):
+            raise ValueError(f"MG returned {len(resp)} values, expected {len(operands)}")
+        return [float(v) for v in resp[:len(operands)]]
+
+    def _read_tp(self):
+        """Current encoder counts (X, Y) in a single 'MG _TPX,_TPY' transaction."""
+        with self._io_lock:
+            resp = self._gcmd("MG _TPX,_TPY")
+        m = _RE_TWO_FLOATS.match(resp)
+        if m is None:
+            raise ValueError(f"Unexpected MG _TPX,_TPY reply: {resp!r}")
+        return float(m.group(1)), float(m.group(2))
 
     # -------------- PT helpers --------------
     def _enter_pt(self):
@@ -166,6 +308,7 @@ class GimbalController:
             # Ensure idle profiler before enabling PT
             self._cmd("ST", quiet=True)
             self._cmd("PT 1,1", quiet=True)
+            self._last_cmd_cnt = (None, None)  # ST may have cut the last target short
             print("[OK] PT mode enabled for streaming PA updates.")
         except Exception:
             print("[WARN] Could not enable PT mode; continuing classic mode.")
@@ -176,6 +319,7 @@ class GimbalController:
         try:
             self._cmd("ST", quiet=True)
             self._cmd("PT 0,0", quiet=True)
+            self._last_cmd_cnt = (None, None)
             print("[OK] PT mode disabled (classic BG motion allowed).")
         except Exception:
             pass
@@ -231,24 +375,38 @@ class GimbalController:
         """Read TP counts and convert to our deg state."""
         cx, cy = 0.0, 0.0
         try:
-            cx = float(self._cmd("TP X", quiet=True).strip())
-        except Exception:
-            pass
-        try:
-            cy = float(self._cmd("TP Y", quiet=True).strip())
+            cx, cy = self._read_tp()
         except Exception:
             pass
         self.curr_az = cx / self.cnt_az
         self.curr_el = cy / self.cnt_el
-        self.curr_pos = [self.curr_az, self.curr_el, 0.0]
+        self._pos[0], self._pos[1] = self.curr_az, self.curr_el
         print(f"[SYNC] AZ={self.curr_az:.3f}°, EL_gimbal={self.curr_el:.3f}°")
 
+    def _save_on_exit(self):
+        """atexit hook: persist state if close() never ran."""
+        if not self._closed:
+            _safe_save_pos(self._pos)
+
+    def async_save(self):
+        """
+        Opt-in per-update persistence: queue a snapshot save on a single background
+        worker so the file write never blocks the motion thread. Returns the Future.
+        """
+        if self._closed:
+            raise RuntimeError("async_save() called after close()")
+        if self._save_pool is None:
+            self._save_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gimbal-save")
+        return self._save_pool.submit(_safe_save_pos, tuple(self._pos))
+
     def close(self):
+        self._stop_stream_worker()
         if not self.sim:
             try:
                 self._cmd("ST", quiet=True)
             except Exception:
                 pass
+            self._stop_interrupts()
             # Back out of PT to leave controller in classic state
             if self.streaming:
                 self._exit_pt()
@@ -256,43 +414,129 @@ class GimbalController:
                 self.g.GClose()
             except Exception:
                 pass
-        _safe_save_pos(self.curr_pos)
+        if self._save_pool is not None:
+            self._save_pool.shutdown(wait=True)  # let queued async saves land first
+            self._save_pool = None
+        _safe_save_pos(self._pos)
+        self._closed = True
+        atexit.unregister(self._save_on_exit)
         print("[CLOSED] Gimbal safely disconnected.")
 
+    # -------------- interrupts --------------
+    def _enable_interrupts(self, address):
+        """
+        Open a second, interrupt-subscribed connection to `address`, enable X/Y
+        motion-complete interrupts on it and start the GInterrupt reader thread.
+        Its short timeout lets the reader notice the stop flag and be joined on close.
+        """
+        gi = gclib.py()
+        try:
+            gi.GOpen(f"{address} -s EI")
+            gi.timeout = INT_TIMEOUT_MS
+            gi.GCommand(f"EI {EI_MASK_XY}")
+        except Exception as e:
+            try:
+                gi.GClose()
+            except Exception:
+                pass
+            print(f"[WARN] Could not enable EI interrupts ({e}); using _TN polling for waits.")
+            return
+        self._gi = gi
+        self._int_stop.clear()
+        self._int_thread = threading.Thread(target=self._int_reader,
+                                            name="gimbal-interrupts", daemon=True)
+        self._int_thread.start()
+        print("[OK] EI motion-complete interrupts enabled.")
+
+    def _int_reader(self):
+        """Block on GInterrupt and set the per-axis in-position events."""
+        while not self._int_stop.is_set():
+            try:
+                status = self._gi.GInterrupt()
+            except Exception:
+                # timeout / no interrupt pending; brief pause so a hard error can't spin
+                self._int_stop.wait(0.01)
+                continue
+            if status in (INT_DONE_X, INT_DONE_ALL):
+                self._inpos_evt[AXIS_AZ].set()
+            if status in (INT_DONE_Y, INT_DONE_ALL):
+                self._inpos_evt[AXIS_EL].set()
+
+    def _arm_inpos(self):
+        """Clear in-position events; call right before BG."""
+        for evt in self._inpos_evt.values():
+            evt.clear()
+
+    def _stop_interrupts(self):
+        th = self._int_thread
+        if th is None:
+            return
+        self._int_stop.set()
+        th.join(timeout=5 * INT_TIMEOUT_MS / 1000.0)
+        self._int_thread = None
+        if th.is_alive():
+            # Reader still inside GInterrupt: don't close the handle under it
+            self._log.warning("[INT] interrupt reader did not stop; leaving its connection open")
+            return
+        try:
+            self._gi.GCommand("EI 0")
+        except Exception:
+            pass
+        try:
+            self._gi.GClose()
+        except Exception:
+            pass
+        self._gi = None
+
     # -------------- waits / health --------------
     def _wait_inpos(self, timeout_s=2.0):
         """
-        Non-blocking in-position wait using _TNX/_TNY (>=1 means in position).
+        In-position wait. With EI interrupts: waits on the per-axis events (no polling).
+        Otherwise polls _TNX/_TNY (>=1 means in position).
         Avoids AMX/AMY which have caused timeouts on some units.
         """
-        t0 = time.time()
-        while time.time() - t0 < timeout_s:
+        if self._int_thread is not None:
+            deadline = time.monotonic() + timeout_s
+            for evt in self._inpos_evt.values():
+                if not evt.wait(max(0.0, deadline - time.monotonic())):
+                    return False
+            return True
+
+        deadline = time.monotonic_ns() + int(timeout_s * 1e9)
+        dt = POLL_DT_MIN
+        while time.monotonic_ns() < deadline:
             try:
-                tn = self._cmd("MG _TNX,_TNY", quiet=True).strip().split()
-                if len(tn) >= 2 and all(float(x) >= 1 for x in tn[:2]):
+                tnx, tny = self._cmd_multi(("_TNX", "_TNY"))
+                if tnx >= 1 and tny >= 1:
                     return True
             except Exception:
                 pass
-            time.sleep(0.02)
+            time.sleep(dt)
+            dt = min(dt * 1.5, POLL_DT_MAX)
         return False
 
     def _wait_settle_counts(self, tgt_x, tgt_y, timeout_s=2.0, tol_counts=30):
         """
         PT settle helper: poll TP until within tolerance of target counts.
         """
-        t0 = time.time()
-        while time.time() - t0 < timeout_s:
+        deadline = time.monotonic_ns() + int(timeout_s * 1e9)
+        dt = POLL_DT_MIN
+        while time.monotonic_ns() < deadline:
             try:
-                cx = float(self._cmd("TP X", quiet=True).strip())
-                cy = float(self._cmd("TP Y", quiet=True).strip())
+                cx, cy = self._read_tp()
                 if abs(cx - tgt_x) <= tol_counts and abs(cy - tgt_y) <= tol_counts:
                     return True
             except Exception:
                 pass
-            time.sleep(0.02)
+            time.sleep(dt)
+            dt = min(dt * 1.5, POLL_DT_MAX)
         return False
 
     # -------------- motion helpers --------------
+    def _deg_to_cnt(self, az, el):
+        """Gimbal-frame degrees → integer counts (X, Y)."""
+        return int(round(az * self._cnt_az_f)), int(round(el * self._cnt_el_f))
+
     def _send_relative_counts(self, dcnt_x, dcnt_y, wait=True):
         """Send PR using classic comma syntax; then BG XY."""
         mv_x = abs(dcnt_x) >= MIN_PR_COUNTS
@@ -310,7 +554,9 @@ class GimbalController:
             self._exit_pt()
 
         self._cmd(f"PR {pr_x},{pr_y}", quiet=True)
+        self._arm_inpos()
         self._cmd("BG XY", quiet=True)
+        self._last_cmd_cnt = (None, None)
 
         if wait:
             self._wait_inpos(timeout_s=2.0)
@@ -325,28 +571,37 @@ class GimbalController:
         """
         Absolute move.
         - In streaming/PT mode: issue PA only (no BG); optionally wait via settle loop.
+          Axes whose target moved < MIN_PA_DELTA are omitted ('PA x,' / 'PA ,y').
         - In classic mode: PA + BG, then _TN waits.
         """
         if self.streaming:
-            # Drop tiny updates to avoid saturating the bus with negligible changes
-            try:
-                cx = float(self._cmd("TP X", quiet=True).strip())
-                cy = float(self._cmd("TP Y", quiet=True).strip())
-            except Exception:
-                cx, cy = None, None
-
-            if cx is not None and cy is not None:
-                if abs(tgt_x - cx) < MIN_PA_DELTA and abs(tgt_y - cy) < MIN_PA_DELTA:
+            # Drop tiny updates to avoid saturating the bus with negligible changes.
+            # Compare against the last commanded target (authoritative in PT) — no TP read.
+            # Lock covers the read-modify-write of _last_cmd_cnt (stream worker thread).
+            with self._io_lock:
+                lx, ly = self._last_cmd_cnt
+                mv_x = lx is None or abs(tgt_x - lx) >= MIN_PA_DELTA
+                mv_y = ly is None or abs(tgt_y - ly) >= MIN_PA_DELTA
+                if not (mv_x or mv_y):
                     return False
 
-            self._cmd(f"PA {int(tgt_x)},{int(tgt_y)}", quiet=True)
+                if mv_x and mv_y:
+                    pa = f"PA {int(tgt_x)},{int(tgt_y)}"
+                elif mv_x:
+                    pa = f"PA {int(tgt_x)},"
+                else:
+                    pa = f"PA ,{int(tgt_y)}"
+                self._cmd(pa, quiet=True)
+                self._last_cmd_cnt = (tgt_x if mv_x else lx, tgt_y if mv_y else ly)
             if wait:
-                self._wait_settle_counts(tgt_x, tgt_y, timeout_s=2.0)
+                self._wait_settle_counts(*self._last_cmd_cnt, timeout_s=2.0)
             return True
 
         # Classic (non-PT)
         self._cmd(f"PA {int(tgt_x)},{int(tgt_y)}", quiet=True)
+        self._arm_inpos()
         self._cmd("BG XY", quiet=True)
+        self._last_cmd_cnt = (tgt_x, tgt_y)
         if wait:
             self._wait_inpos(timeout_s=2.0)
         return True
@@ -358,76 +613,57 @@ class GimbalController:
         NOTE: If you feed sky elevation here, internal convention assumes:
               EL_gimbal = EL_sky - 90°
         """
+        self._stop_stream_worker()
         target_az = _clip(float(az_deg), AZ_MIN, AZ_MAX)
         target_el = _clip(float(el_sky_deg) - 90.0, EL_MIN, EL_MAX)
 
-        if self.sim:
-            self.curr_az, self.curr_el = target_az, target_el
-            self.curr_pos = [self.curr_az, self.curr_el, 0.0]
-            return
-
-        curr_cnt_x = int(round(self.curr_az * self.cnt_az))
-        curr_cnt_y = int(round(self.curr_el * self.cnt_el))
-        tgt_cnt_x  = int(round(target_az * self.cnt_az))
-        tgt_cnt_y  = int(round(target_el * self.cnt_el))
+        curr_cnt_x, curr_cnt_y = self._deg_to_cnt(self.curr_az, self.curr_el)
+        tgt_cnt_x, tgt_cnt_y = self._deg_to_cnt(target_az, target_el)
 
         if (tgt_cnt_x == curr_cnt_x) and (tgt_cnt_y == curr_cnt_y):
             return
 
-        # Use classic PA+BG for one-shot absolute moves (exit PT temporarily if needed)
-        was_pt = self.streaming
-        if was_pt:
-            self._exit_pt()
-        self._send_absolute_counts(tgt_cnt_x, tgt_cnt_y, wait=wait)  # classic branch inside
-        if was_pt:
-            self._enter_pt()
+        # PT: PA only (stays in PT). Classic: PA+BG. Branch chosen inside.
+        self._send_absolute_counts(tgt_cnt_x, tgt_cnt_y, wait=wait)
 
         self.curr_az = target_az
         self.curr_el = target_el
-        self.curr_pos = [self.curr_az, self.curr_el, 0.0]
+        self._pos[0], self._pos[1] = self.curr_az, self.curr_el
 
     def move_relative(self, d_az, d_el_sky, wait=True):
         """
         Relative movement (ΔAz_deg, ΔEl_sky_deg). Limits enforced.
         """
+        self._stop_stream_worker()
         new_az = _clip(self.curr_az + float(d_az), AZ_MIN, AZ_MAX)
         new_el = _clip(self.curr_el + float(d_el_sky), EL_MIN, EL_MAX)
 
-        if self.sim:
-            self.curr_az, self.curr_el = new_az, new_el
-            self.curr_pos = [new_az, new_el, 0.0]
-            return
-
-        dcnt_x = int(round((new_az - self.curr_az) * self.cnt_az))
-        dcnt_y = int(round((new_el - self.curr_el) * self.cnt_el))
+        dcnt_x, dcnt_y = self._deg_to_cnt(new_az - self.curr_az, new_el - self.curr_el)
 
         if self._send_relative_counts(dcnt_x, dcnt_y, wait=wait):
             self.curr_az, self.curr_el = new_az, new_el
-            self.curr_pos = [new_az, new_el, 0.0]
+            self._pos[0], self._pos[1] = new_az, new_el
 
     def degSteer(self, az_gim, el_gim, absolute=True, wait=False, eps_deg=1e-6):
         """
         Steer using *gimbal-frame* degrees (AZ: -90..+90, EL: -90..+90).
         absolute=True  → target absolute (recommended for streaming/PT)
-        absolute=False → relative (classic PR path; will temporarily exit PT)
+        absolute=False → relative (PT: PA to current+delta; classic: PR+BG)
         """
-        target_az = _clip(float(az_gim), AZ_MIN, AZ_MAX)
-        target_el = _clip(float(el_gim), EL_MIN, EL_MAX)
-
-        if self.sim:
-            if absolute:
-                self.curr_az, self.curr_el = target_az, target_el
-            else:
-                self.curr_az = _clip(self.curr_az + target_az, AZ_MIN, AZ_MAX)
-                self.curr_el = _clip(self.curr_el + target_el, EL_MIN, EL_MAX)
-            self.curr_pos = [self.curr_az, self.curr_el, 0.0]
-            return
+        self._stop_stream_worker()
+        az_lo, az_hi, el_lo, el_hi = self._lim
+        v = float(az_gim)
+        if v != v:
+            raise ValueError("degSteer: AZ target is NaN")
+        target_az = az_lo if v < az_lo else az_hi if v > az_hi else v
+        v = float(el_gim)
+        if v != v:
+            raise ValueError("degSteer: EL target is NaN")
+        target_el = el_lo if v < el_lo else el_hi if v > el_hi else v
 
         if absolute:
-            curr_cnt_x = int(round(self.curr_az * self.cnt_az))
-            curr_cnt_y = int(round(self.curr_el * self.cnt_el))
-            tgt_cnt_x  = int(round(target_az * self.cnt_az))
-            tgt_cnt_y  = int(round(target_el * self.cnt_el))
+            curr_cnt_x, curr_cnt_y = self._deg_to_cnt(self.curr_az, self.curr_el)
+            tgt_cnt_x, tgt_cnt_y = self._deg_to_cnt(target_az, target_el)
 
             if (tgt_cnt_x == curr_cnt_x) and (tgt_cnt_y == curr_cnt_y):
                 return
@@ -438,25 +674,191 @@ class GimbalController:
             self.curr_az, self.curr_el = target_az, target_el
 
         else:
-            # Relative steering: temporarily exit PT to PR+BG, then re-enter PT
-            dcnt_x = int(round(target_az * self.cnt_az))
-            dcnt_y = int(round(target_el * self.cnt_el))
-
-            was_pt = self.streaming
-            if was_pt:
-                self._exit_pt()
-
-            if self._send_relative_counts(dcnt_x, dcnt_y, wait=wait):
-                self.curr_az = _clip(self.curr_az + (dcnt_x / self.cnt_az), AZ_MIN, AZ_MAX)
-                self.curr_el = _clip(self.curr_el + (dcnt_y / self.cnt_el), EL_MIN, EL_MAX)
-
-            if was_pt:
-                self._enter_pt()
-
-        self.curr_pos = [self.curr_az, self.curr_el, 0.0]
+            if self.streaming:
+                # Relative as absolute: PA current+delta keeps PT enabled (no ST/PT toggle)
+                v = self.curr_az + target_az
+                new_az = az_lo if v < az_lo else az_hi if v > az_hi else v
+                v = self.curr_el + target_el
+                new_el = el_lo if v < el_lo else el_hi if v > el_hi else v
+                tgt_cnt_x, tgt_cnt_y = self._deg_to_cnt(new_az, new_el)
+                self._send_absolute_counts(tgt_cnt_x, tgt_cnt_y, wait=wait)
+                self.curr_az, self.curr_el = new_az, new_el
+            else:
+                # Classic PR+BG
+                dcnt_x, dcnt_y = self._deg_to_cnt(target_az, target_el)
+                if self._send_relative_counts(dcnt_x, dcnt_y, wait=wait):
+                    v = self.curr_az + (dcnt_x / self.cnt_az)
+                    self.curr_az = az_lo if v < az_lo else az_hi if v > az_hi else v
+                    v = self.curr_el + (dcnt_y / self.cnt_el)
+                    self.curr_el = el_lo if v < el_lo else el_hi if v > el_hi else v
+
+        self._pos[0], self._pos[1] = self.curr_az, self.curr_el
+
+    # -------------- simulation variants (bound over the public API when sim) --------------
+    def _move_absolute_sim(self, az_deg, el_sky_deg, eps_deg=1e-6, wait=True):
+        self.curr_az = _clip(float(az_deg), AZ_MIN, AZ_MAX)
+        self.curr_el = _clip(float(el_sky_deg) - 90.0, EL_MIN, EL_MAX)
+        self._pos[0], self._pos[1] = self.curr_az, self.curr_el
+
+    def _move_relative_sim(self, d_az, d_el_sky, wait=True):
+        self.curr_az = _clip(self.curr_az + float(d_az), AZ_MIN, AZ_MAX)
+        self.curr_el = _clip(self.curr_el + float(d_el_sky), EL_MIN, EL_MAX)
+        self._pos[0], self._pos[1] = self.curr_az, self.curr_el
+
+    def _degSteer_sim(self, az_gim, el_gim, absolute=True, wait=False, eps_deg=1e-6):
+        target_az = _clip(float(az_gim), AZ_MIN, AZ_MAX)
+        target_el = _clip(float(el_gim), EL_MIN, EL_MAX)
+        if absolute:
+            self.curr_az, self.curr_el = target_az, target_el
+        else:
+            self.curr_az = _clip(self.curr_az + target_az, AZ_MIN, AZ_MAX)
+            self.curr_el = _clip(self.curr_el + target_el, EL_MIN, EL_MAX)
+        self._pos[0], self._pos[1] = self.curr_az, self.curr_el
+
+    def _stream_targets_sim(self, az_arr, el_arr, period_s, wait=False):
+        az, el = self._prep_stream(az_arr, el_arr, period_s)
+        if az.size:
+            self.curr_az, self.curr_el = float(az[-1]), float(el[-1])
+            self._pos[0], self._pos[1] = self.curr_az, self.curr_el
+        return 0
+
+    def _submit_target_sim(self, az_gim, el_gim):
+        if not self.streaming:
+            raise RuntimeError("submit_target() requires streaming (PT) mode; "
+                               "use degSteer(..., wait=True) in classic mode")
+        self.curr_az = _clip(float(az_gim), AZ_MIN, AZ_MAX)
+        self.curr_el = _clip(float(el_gim), EL_MIN, EL_MAX)
+        self._pos[0], self._pos[1] = self.curr_az, self.curr_el
+
+    # -------------- bulk stream --------------
+    def _prep_stream(self, az_arr, el_arr, period_s):
+        """Validate a bulk track and return clipped float64 (az, el) arrays."""
+        if not period_s > 0:
+            raise ValueError(f"period_s must be > 0, got {period_s!r}")
+        az = np.atleast_1d(np.asarray(az_arr, dtype=np.float64)).ravel()
+        el = np.atleast_1d(np.asarray(el_arr, dtype=np.float64)).ravel()
+        if az.shape != el.shape:
+            raise ValueError(f"az/el length mismatch: {az.shape} vs {el.shape}")
+        if not (np.isfinite(az).all() and np.isfinite(el).all()):
+            raise ValueError("stream_targets: non-finite (NaN/inf) target in input")
+        return np.clip(az, AZ_MIN, AZ_MAX), np.clip(el, EL_MIN, EL_MAX)
+
+    def stream_targets(self, az_arr, el_arr, period_s, wait=False):
+        """
+        Bulk streaming of *gimbal-frame* absolute targets (e.g. a pre-computed PCHIP track).
+        Clipping and deg→count conversion are done once for the whole array with NumPy;
+        each sample is then dispatched as a PA (PT deadband still applies).
+        period_s: sample spacing in seconds (> 0). Required: in PT each PA replaces the
+                  previous target, so an unpaced burst would collapse to the last sample.
+        Classic mode (streaming=False) always waits for each move (BG while running = TC:7).
+        Returns the number of PA commands actually sent.
+        """
+        self._stop_stream_worker()
+        az, el = self._prep_stream(az_arr, el_arr, period_s)
+        if az.size == 0:
+            return 0
+
+        if not self.streaming:
+            wait = True
+
+        cx = np.rint(az * self._cnt_az_f).astype(np.int64).tolist()
+        cy = np.rint(el * self._cnt_el_f).astype(np.int64).tolist()
+        az, el = az.tolist(), el.tolist()
+
+        sent = 0
+        send = self._send_absolute_counts
+        t_next = time.monotonic()
+        for i in range(len(cx)):
+            if send(cx[i], cy[i], wait=wait):
+                sent += 1
+            self.curr_az, self.curr_el = az[i], el[i]
+            t_next += period_s
+            rest = t_next - time.monotonic()
+            if rest > 0:
+                time.sleep(rest)
+
+        self._pos[0], self._pos[1] = self.curr_az, self.curr_el
+        return sent
+
+    # -------------- coalescing stream --------------
+    def submit_target(self, az_gim, el_gim):
+        """
+        Non-blocking absolute steer in *gimbal-frame* degrees.
+        The target overwrites any not-yet-sent one; a background thread sends
+        the freshest target as one PA per STREAM_TICK_S. Object state (curr_az/el)
+        is updated by the worker once that PA has actually been sent.
+        Requires PT (streaming=True): classic PA+BG every tick would be TC:7.
+        Any other motion call stops the worker first (pending target dropped).
+        """
+        if not self.streaming:
+            raise RuntimeError("submit_target() requires streaming (PT) mode; "
+                               "use degSteer(..., wait=True) in classic mode")
+        th = self._stream_thread
+        if th is not None and not th.is_alive():
+            th = self._stream_thread = None
+        if th is not None and self._stream_stop.is_set():
+            # A stopped worker is still stuck in a command; never run two drainers
+            raise RuntimeError("submit_target(): previous stream worker has not exited yet")
+
+        az_lo, az_hi, el_lo, el_hi = self._lim
+        target_az = _clip(float(az_gim), az_lo, az_hi)
+        target_el = _clip(float(el_gim), el_lo, el_hi)
+        tgt_x, tgt_y = self._deg_to_cnt(target_az, target_el)
+
+        with self._pending_lock:
+            self._pending_target = (tgt_x, tgt_y, target_az, target_el)
+        self._pending_evt.set()
+
+        if th is None:
+            self._stream_stop.clear()
+            self._stream_thread = threading.Thread(target=self._stream_worker,
+                                                   name="gimbal-stream", daemon=True)
+            self._stream_thread.start()
+
+    def _stream_worker(self):
+        """Drain the single-slot target: at most one PA per tick, always the freshest."""
+        while not self._stream_stop.is_set():
+            if not self._pending_evt.wait(STREAM_TICK_S):
+                continue
+            t0 = time.monotonic()
+            with self._pending_lock:
+                tgt = self._pending_target
+                self._pending_target = None
+                self._pending_evt.clear()
+            if tgt is None or self._stream_stop.is_set():
+                continue
+            tgt_x, tgt_y, target_az, target_el = tgt
+            try:
+                self._send_absolute_counts(tgt_x, tgt_y, wait=False)
+            except Exception as e:
+                self._log.warning("[STREAM] PA dispatch failed: %s", e)
+            else:
+                # Only a sent (or within-deadband) target becomes our state
+                self.curr_az, self.curr_el = target_az, target_el
+                self._pos[0], self._pos[1] = target_az, target_el
+            rest = STREAM_TICK_S - (time.monotonic() - t0)
+            if rest > 0:
+                self._stream_stop.wait(rest)
+
+    def _stop_stream_worker(self):
+        th = self._stream_thread
+        if th is None:
+            return
+        self._stream_stop.set()
+        self._pending_evt.set()
+        th.join(timeout=1.0)
+        with self._pending_lock:
+            self._pending_target = None
+            self._pending_evt.clear()
+        if th.is_alive():
+            # Still blocked in a command: keep the reference so no second worker starts
+            self._log.warning("[STREAM] stream worker did not stop within 1 s")
+            return
+        self._stream_thread = None
 
     # ---------------- UTILITY ----------------
     def stop(self):
+        self._stop_stream_worker()  # don't let a queued target restart motion after ST
         if not self.sim:
             try:
                 self._cmd("ST", quiet=True)